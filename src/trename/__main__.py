@@ -5,12 +5,20 @@ import io
 
 from trename.cli import app
 
+# 是否已完成 UTF-8 输出设置（避免重复调用时二次包装流）
+_utf8_set = False
+
 
 def setup_utf8_output():
     """强制设置 stdout/stderr 为 UTF-8 编码
     
     兼容老版 Windows PowerShell，避免中文输出乱码
     """
+    global _utf8_set
+    if _utf8_set:
+        return
+    _utf8_set = True
+
     if sys.platform == 'win32':
         # 强制使用 UTF-8 编码，errors='replace' 避免编码错误崩溃
         if hasattr(sys.stdout, 'buffer'):
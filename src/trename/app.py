@@ -3,26 +3,30 @@
 提供完整的可视化操作界面。
 """
 
-import json
+import os
+import uuid
 from pathlib import Path
 
 import streamlit as st
 
 from trename.clipboard import ClipboardHandler
 from trename.models import (
+    Conflict,
     DirNode,
     FileNode,
     RenameJSON,
     RenameNode,
-    count_pending,
-    count_ready,
+    count_all,
     count_total,
 )
 from trename.renamer import FileRenamer
-from trename.scanner import FileScanner
+from trename.scanner import FileScanner, parse_exclude_exts, split_json
 from trename.undo import UndoManager
 from trename.validator import ConflictValidator
 
+# 文件树每次追加显示的行数
+VISIBLE_STEP = 100
+
 # 页面配置
 st.set_page_config(
     page_title="trename - 文件批量重命名",
@@ -39,97 +43,261 @@ if "conflicts" not in st.session_state:
     st.session_state.conflicts = []
 if "message" not in st.session_state:
     st.session_state.message = None
+if "last_validated_key" not in st.session_state:
+    st.session_state.last_validated_key = None
+if "rename_version" not in st.session_state:
+    # rename_json 每次被修改都递增，作为缓存键，避免每次重跑都序列化整棵树
+    st.session_state.rename_version = 0
+if "session_token" not in st.session_state:
+    # st.cache_data 跨会话共享，缓存键需带上会话标识
+    st.session_state.session_token = uuid.uuid4().hex
+if "tree_generation" not in st.session_state:
+    st.session_state.tree_generation = 0
+if "visible_limit" not in st.session_state:
+    st.session_state.visible_limit = VISIBLE_STEP
 
 
-def render_node(
-    node: RenameNode,
-    parent_path: Path,
-    conflict_paths: set,
-    key_prefix: str,
-) -> RenameNode:
-    """渲染单个节点并返回更新后的节点"""
-    if isinstance(node, FileNode):
-        src_path = parent_path / node.src
-        is_conflict = any(src_path == c[0] for c in conflict_paths)
-
-        col1, col2, col3 = st.columns([3, 3, 1])
-
-        with col1:
-            st.text(f"📄 {node.src}")
-
-        with col2:
-            new_tgt = st.text_input(
-                "目标名",
-                value=node.tgt,
-                key=f"{key_prefix}_tgt",
-                label_visibility="collapsed",
-                placeholder="输入目标文件名...",
-            )
+@st.cache_data(show_spinner=False)
+def _parse_exts(exclude_exts_str: str) -> frozenset[str]:
+    """缓存排除扩展名的解析结果"""
+    return parse_exclude_exts(exclude_exts_str)
 
-        with col3:
-            if is_conflict:
-                st.markdown("🔴 冲突")
-            elif node.is_pending:
-                st.markdown("🟡 待翻译")
-            elif node.is_ready:
-                st.markdown("🟢 就绪")
-            else:
-                st.markdown("⚪ 相同")
 
-        return FileNode(src=node.src, tgt=new_tgt)
+# 扫描器只按排除扩展名区分，保留最近用过的几种配置即可
+@st.cache_resource(max_entries=8)
+def _scanner(exclude_exts: frozenset[str] = frozenset()) -> FileScanner:
+    """按排除扩展名缓存的扫描器（配置只读，可跨会话共享）"""
+    return FileScanner(exclude_exts=exclude_exts)
 
-    else:  # DirNode
-        src_path = parent_path / node.src_dir
-        is_conflict = any(src_path == c[0] for c in conflict_paths)
 
-        col1, col2, col3 = st.columns([3, 3, 1])
+@st.cache_resource
+def _validator() -> ConflictValidator:
+    """进程内共享的冲突检测器"""
+    return ConflictValidator()
 
-        with col1:
-            st.text(f"📁 {node.src_dir}")
 
-        with col2:
-            new_tgt_dir = st.text_input(
-                "目标名",
-                value=node.tgt_dir,
-                key=f"{key_prefix}_tgt",
-                label_visibility="collapsed",
-                placeholder="输入目标目录名...",
-            )
+def _undo_manager() -> UndoManager:
+    """当前会话复用的撤销管理器
 
-        with col3:
-            if is_conflict:
-                st.markdown("🔴 冲突")
-            elif node.is_pending:
-                st.markdown("🟡 待翻译")
-            elif node.is_ready:
-                st.markdown("🟢 就绪")
-            else:
-                st.markdown("⚪ 相同")
-
-        # 递归渲染子节点
-        new_children = []
-        with st.container():
-            for i, child in enumerate(node.children):
-                with st.container():
-                    st.markdown(
-                        "<div style='margin-left: 20px;'>",
-                        unsafe_allow_html=True,
-                    )
-                    new_child = render_node(
-                        child,
-                        src_path,
-                        conflict_paths,
-                        f"{key_prefix}_{i}",
+    每个会话只打开一次数据库连接；不用 st.cache_resource 跨会话共享，
+    避免多个会话在同一连接上交错事务。
+    """
+    if "undo_manager" not in st.session_state:
+        st.session_state.undo_manager = UndoManager(check_same_thread=False)
+    return st.session_state.undo_manager
+
+
+# 版本号变化后旧缓存不会再被读取，只需保留少量条目（供多个会话同时使用）
+_CACHE_MAX_ENTRIES = 16
+
+
+def _bump_version() -> None:
+    """标记 rename_json 已被修改"""
+    st.session_state.rename_version += 1
+
+
+def _reset_tree() -> None:
+    """rename_json 被扫描/导入替换或追加后调用
+
+    更换表格编辑器的 key，标记数据已修改，并把文件树显示行数恢复为初始值。
+    """
+    st.session_state.tree_generation += 1
+    st.session_state.visible_limit = VISIBLE_STEP
+    _bump_version()
+
+
+def _version_key() -> tuple[str, int]:
+    """当前会话 rename_json 的缓存键（O(1)，不序列化数据）"""
+    return (st.session_state.session_token, st.session_state.rename_version)
+
+
+@st.cache_data(show_spinner=False, max_entries=_CACHE_MAX_ENTRIES)
+def _validate_cached(version_key: tuple[str, int], base: str) -> list[Conflict]:
+    """按数据版本和基础路径缓存冲突检测结果
+
+    缓存键只包含版本号，实际数据从 session state 读取。
+    """
+    return _validator().validate(st.session_state.rename_json, Path(base))
+
+
+@st.cache_data(show_spinner=False, max_entries=_CACHE_MAX_ENTRIES)
+def _serialize_segments(version_key: tuple[str, int], max_lines: int, compact: bool) -> list[str]:
+    """缓存各分段序列化后的 JSON 字符串"""
+    scanner = _scanner()
+    segments = split_json(st.session_state.rename_json, max_lines=max_lines)
+    if compact:
+        return [scanner.to_compact_json(seg) for seg in segments]
+    return [scanner.to_json(seg) for seg in segments]
+
+
+# 节点状态标记：0=相同, 1=待翻译, 2=就绪, 3=冲突
+_STATUS_MARKDOWN = ("⚪ 相同", "🟡 待翻译", "🟢 就绪", "🔴 冲突")
+
+# 文件树表格中每一层的缩进（不换行空格，避免被表格单元格折叠）
+_INDENT = "\u00a0" * 4
+
+
+def render_tree(
+    nodes: list[RenameNode],
+    base_path: str,
+    conflict_src_paths: frozenset[str],
+    limit: int,
+) -> bool:
+    """渲染文件树，把编辑后的目标名写回节点
+
+    按前序展开前 limit 行，交给单个 st.data_editor 一次性渲染，
+    只有“目标名”列可编辑；超出的节点既不展开也不会被修改。
+    路径全程以字符串拼接，与 conflict_src_paths 中的字符串直接比较，
+    不构造 Path 对象。
+
+    Returns:
+        是否还有未显示的节点
+    """
+    sep = os.sep
+    rows: list[dict[str, str]] = []
+    visible: list[RenameNode] = []
+    # (节点, 父路径, 深度)
+    stack: list[tuple[RenameNode, str, int]] = [
+        (node, base_path.rstrip(sep), 0) for node in reversed(nodes)
+    ]
+
+    while stack and len(rows) < limit:
+        node, parent_path, depth = stack.pop()
+
+        if isinstance(node, FileNode):
+            src, value, icon = node.src, node.tgt, "📄"
+        else:  # DirNode
+            src, value, icon = node.src_dir, node.tgt_dir, "📁"
+        src_path = parent_path + sep + src
+
+        if src_path in conflict_src_paths:
+            status = 3
+        elif value == "":
+            status = 1
+        else:
+            status = 2 if value != src else 0
+
+        rows.append({
+            "源名称": f"{_INDENT * depth}{icon} {src}",
+            "目标名": value,
+            "状态": _STATUS_MARKDOWN[status],
+        })
+        visible.append(node)
+
+        if isinstance(node, DirNode):
+            # 子节点逆序入栈，保证按原顺序展开
+            for child in reversed(node.children):
+                stack.append((child, src_path, depth + 1))
+
+    edited = st.data_editor(
+        rows,
+        # 数据被扫描/导入替换时换 key，避免旧的编辑套用到新数据上
+        key=f"tree_editor_{st.session_state.tree_generation}",
+        disabled=["源名称", "状态"],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "源名称": st.column_config.TextColumn("源名称", width="large"),
+            "目标名": st.column_config.TextColumn("目标名", width="large"),
+            "状态": st.column_config.TextColumn("状态", width="small"),
+        },
+    )
+
+    # 只回写实际变化的节点
+    changed = False
+    for node, row, edited_row in zip(visible, rows, edited):
+        tgt = edited_row["目标名"] or ""
+        if tgt == row["目标名"]:
+            continue
+        if isinstance(node, FileNode):
+            node.tgt = tgt
+        else:
+            node.tgt_dir = tgt
+        changed = True
+    if changed:
+        _bump_version()
+        # 编辑只触发文件树 fragment 重跑；侧边栏的统计和导出数据仍是旧的，
+        # 需要整页重跑一次（按版本缓存的检测和序列化结果仍可复用）
+        st.rerun(scope="app")
+
+    return bool(stack)
+
+
+def _show_more() -> None:
+    """文件树追加显示一批节点"""
+    st.session_state.visible_limit += VISIBLE_STEP
+
+
+@st.fragment
+def _undo_history_fragment() -> None:
+    """侧边栏撤销历史（独立 fragment，编辑文件树时不重新读取）"""
+    st.subheader("4. 撤销历史")
+    undo_manager = _undo_manager()
+    history = undo_manager.get_history(limit=5)
+
+    if history:
+        for record in history:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.text(f"{record.id} ({len(record.operations)}项)")
+            with col2:
+                if st.button("↩️", key=f"undo_{record.id}"):
+                    result = undo_manager.undo(record.id)
+                    _validate_cached.clear()
+                    st.session_state.last_validated_key = None
+                    st.session_state.message = (
+                        "success",
+                        f"撤销完成: {result.success_count} 成功",
                     )
-                    new_children.append(new_child)
-                    st.markdown("</div>", unsafe_allow_html=True)
+                    st.rerun()
+    else:
+        st.text("暂无历史记录")
+
 
-        return DirNode(
-            src_dir=node.src_dir,
-            tgt_dir=new_tgt_dir,
-            children=new_children,
+@st.fragment
+def _tree_fragment() -> None:
+    """文件树编辑区
+
+    作为独立 fragment 运行，与编辑无关的交互（显示更多、预览）只重跑这一块；
+    目标名有改动时由 render_tree 触发整页重跑，使侧边栏的统计和导出同步更新。
+    """
+    rename_json = st.session_state.rename_json
+
+    st.subheader("文件树")
+
+    # 获取冲突路径
+    conflict_src_paths: frozenset[str] = frozenset()
+    if st.session_state.base_path:
+        # 数据未变化时复用上次的检测结果
+        version_key = _version_key()
+        base = str(st.session_state.base_path)
+        if (version_key, base) != st.session_state.last_validated_key:
+            st.session_state.conflicts = _validate_cached(version_key, base)
+            st.session_state.last_validated_key = (version_key, base)
+        conflict_src_paths = frozenset(str(c.src_path) for c in st.session_state.conflicts)
+
+    # 渲染文件树
+    # 与冲突检测一致，使用解析后的绝对基础路径
+    has_more = render_tree(
+        rename_json.root,
+        str(Path(st.session_state.base_path or Path.cwd()).resolve()),
+        conflict_src_paths,
+        st.session_state.visible_limit,
+    )
+    if has_more:
+        st.button(
+            "显示更多",
+            use_container_width=True,
+            key="show_more",
+            on_click=_show_more,
         )
 
+    # JSON 预览
+    with st.expander("JSON 预览"):
+        # 仅在勾选后生成预览，大文件树不必每次重跑都转换
+        if st.checkbox("显示预览", key="_preview_open"):
+            st.json(st.session_state.rename_json.model_dump(mode="json"))
+
 
 def main():
     st.title("📁 trename - 文件批量重命名")
@@ -158,16 +326,7 @@ def main():
         with col_scan1:
             if st.button("🔍 扫描(合并)", use_container_width=True):
                 try:
-                    # 解析排除扩展名
-                    exclude_exts: set[str] = set()
-                    if exclude_exts_str:
-                        exclude_exts = {
-                            ext.strip() if ext.strip().startswith(".") else f".{ext.strip()}"
-                            for ext in exclude_exts_str.split(",")
-                            if ext.strip()
-                        }
-
-                    scanner = FileScanner(exclude_exts=exclude_exts)
+                    scanner = _scanner(_parse_exts(exclude_exts_str))
 
                     # 解析多个目录路径
                     paths = [Path(p.strip()) for p in scan_paths_str.strip().split("\n") if p.strip()]
@@ -177,13 +336,14 @@ def main():
                         st.session_state.rename_json = RenameJSON(root=[])
 
                     total_scanned = 0
-                    for path in paths:
-                        result = scanner.scan_as_single_dir(path)
+                    for result in scanner.scan_many(paths):
                         st.session_state.rename_json.root.extend(result.root)
                         total_scanned += count_total(result)
 
                     st.session_state.base_path = paths[0].parent if paths else Path.cwd()
                     st.session_state.conflicts = []
+                    st.session_state.last_validated_key = None
+                    _reset_tree()
                     st.session_state.message = ("success", f"扫描完成: {len(paths)} 个目录, {total_scanned} 项")
                     st.rerun()
                 except Exception as e:
@@ -193,16 +353,7 @@ def main():
         with col_scan2:
             if st.button("🔄 扫描(替换)", use_container_width=True):
                 try:
-                    # 解析排除扩展名
-                    exclude_exts: set[str] = set()
-                    if exclude_exts_str:
-                        exclude_exts = {
-                            ext.strip() if ext.strip().startswith(".") else f".{ext.strip()}"
-                            for ext in exclude_exts_str.split(",")
-                            if ext.strip()
-                        }
-
-                    scanner = FileScanner(exclude_exts=exclude_exts)
+                    scanner = _scanner(_parse_exts(exclude_exts_str))
 
                     # 解析多个目录路径
                     paths = [Path(p.strip()) for p in scan_paths_str.strip().split("\n") if p.strip()]
@@ -211,13 +362,14 @@ def main():
                     st.session_state.rename_json = RenameJSON(root=[])
 
                     total_scanned = 0
-                    for path in paths:
-                        result = scanner.scan_as_single_dir(path)
+                    for result in scanner.scan_many(paths):
                         st.session_state.rename_json.root.extend(result.root)
                         total_scanned += count_total(result)
 
                     st.session_state.base_path = paths[0].parent if paths else Path.cwd()
                     st.session_state.conflicts = []
+                    st.session_state.last_validated_key = None
+                    _reset_tree()
                     st.session_state.message = ("success", f"扫描完成: {len(paths)} 个目录, {total_scanned} 项")
                     st.rerun()
                 except Exception as e:
@@ -241,6 +393,7 @@ def main():
                         st.session_state.rename_json.root.extend(new_json.root)
                     else:
                         st.session_state.rename_json = new_json
+                    _reset_tree()
                     st.session_state.message = ("success", f"导入成功: {count_total(new_json)} 项")
                     st.rerun()
                 except Exception as e:
@@ -251,6 +404,7 @@ def main():
                 try:
                     json_str = ClipboardHandler.paste()
                     st.session_state.rename_json = RenameJSON.model_validate_json(json_str)
+                    _reset_tree()
                     st.session_state.message = ("success", "从剪贴板替换成功")
                     st.rerun()
                 except Exception as e:
@@ -268,16 +422,19 @@ def main():
                 try:
                     total_imported = 0
                     for uploaded_file in uploaded_files:
-                        json_str = uploaded_file.read().decode("utf-8")
-                        new_json = RenameJSON.model_validate_json(json_str)
+                        # 直接从字节解析，省去 decode 产生的整份字符串副本
+                        new_json = RenameJSON.model_validate_json(uploaded_file.getvalue())
                         if st.session_state.rename_json:
                             st.session_state.rename_json.root.extend(new_json.root)
                         else:
                             st.session_state.rename_json = new_json
                         total_imported += count_total(new_json)
+                    _reset_tree()
                     st.session_state.message = ("success", f"导入 {len(uploaded_files)} 个文件, {total_imported} 项")
                     st.rerun()
                 except Exception as e:
+                    # 出错前已合并的文件同样改变了数据，缓存需要失效
+                    _reset_tree()
                     st.session_state.message = ("error", f"导入失败: {e}")
 
         st.divider()
@@ -285,14 +442,16 @@ def main():
         # 导出
         st.subheader("3. 导出")
 
-        from trename.scanner import split_json
-
         # 分段设置
         max_lines = st.number_input("分段行数", min_value=50, max_value=5000, value=1000, step=100)
         use_compact = st.checkbox("紧凑格式", value=True)
 
         if st.session_state.rename_json:
+            version_key = _version_key()
+            # 分段只是重新分组已有的根节点，直接计算即可；
+            # st.cache_data 每次命中都要反序列化一份深拷贝，反而更慢
             segments = split_json(st.session_state.rename_json, max_lines=max_lines)
+            segment_strs = _serialize_segments(version_key, max_lines, use_compact)
             st.text(f"共 {len(segments)} 段")
 
             export_tab1, export_tab2 = st.tabs(["📋 复制", "💾 下载"])
@@ -300,12 +459,7 @@ def main():
             with export_tab1:
                 if len(segments) == 1:
                     if st.button("复制到剪贴板", use_container_width=True, key="copy_all"):
-                        scanner = FileScanner()
-                        if use_compact:
-                            json_str = scanner.to_compact_json(segments[0])
-                        else:
-                            json_str = scanner.to_json(segments[0])
-                        ClipboardHandler.copy(json_str)
+                        ClipboardHandler.copy(segment_strs[0])
                         st.session_state.message = ("success", "已复制到剪贴板")
                         st.rerun()
                 else:
@@ -316,25 +470,15 @@ def main():
                         format_func=lambda i: f"第 {i+1} 段 ({count_total(segments[i])} 项)",
                     )
                     if st.button(f"复制第 {seg_idx+1} 段", use_container_width=True, key="copy_seg"):
-                        scanner = FileScanner()
-                        if use_compact:
-                            json_str = scanner.to_compact_json(segments[seg_idx])
-                        else:
-                            json_str = scanner.to_json(segments[seg_idx])
-                        ClipboardHandler.copy(json_str)
+                        ClipboardHandler.copy(segment_strs[seg_idx])
                         st.session_state.message = ("success", f"第 {seg_idx+1} 段已复制")
                         st.rerun()
 
             with export_tab2:
-                scanner = FileScanner()
                 for i, seg in enumerate(segments):
-                    if use_compact:
-                        json_str = scanner.to_compact_json(seg)
-                    else:
-                        json_str = scanner.to_json(seg)
                     st.download_button(
                         f"下载第 {i+1} 段 ({count_total(seg)} 项)",
-                        data=json_str,
+                        data=segment_strs[i],
                         file_name=f"rename_{i+1}.json",
                         mime="application/json",
                         use_container_width=True,
@@ -343,26 +487,7 @@ def main():
 
         st.divider()
 
-        # 撤销历史
-        st.subheader("4. 撤销历史")
-        undo_manager = UndoManager()
-        history = undo_manager.get_history(limit=5)
-
-        if history:
-            for record in history:
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.text(f"{record.id} ({len(record.operations)}项)")
-                with col2:
-                    if st.button("↩️", key=f"undo_{record.id}"):
-                        result = undo_manager.undo(record.id)
-                        st.session_state.message = (
-                            "success",
-                            f"撤销完成: {result.success_count} 成功",
-                        )
-                        st.rerun()
-        else:
-            st.text("暂无历史记录")
+        _undo_history_fragment()
 
     # 主区域
     # 显示消息
@@ -388,12 +513,13 @@ def main():
     with col1:
         if st.button("🔄 检测冲突", use_container_width=True):
             if st.session_state.base_path:
-                validator = ConflictValidator()
-                conflicts = validator.validate(
-                    st.session_state.rename_json,
-                    st.session_state.base_path,
-                )
+                # 手动检测时忽略缓存，文件系统可能已在外部变化
+                _validate_cached.clear()
+                version_key = _version_key()
+                base = str(st.session_state.base_path)
+                conflicts = _validate_cached(version_key, base)
                 st.session_state.conflicts = conflicts
+                st.session_state.last_validated_key = (version_key, base)
                 if conflicts:
                     st.session_state.message = (
                         "warning",
@@ -406,8 +532,7 @@ def main():
     with col2:
         if st.button("▶️ 执行重命名", type="primary", use_container_width=True):
             if st.session_state.base_path:
-                undo_manager = UndoManager()
-                renamer = FileRenamer(undo_manager)
+                renamer = FileRenamer(_undo_manager())
                 result = renamer.rename_batch(
                     st.session_state.rename_json,
                     st.session_state.base_path,
@@ -417,13 +542,16 @@ def main():
                     f"重命名完成: {result.success_count} 成功, "
                     f"{result.failed_count} 失败, {result.skipped_count} 跳过",
                 )
+                _validate_cached.clear()
+                st.session_state.last_validated_key = None
                 # 不自动重新扫描，保留当前数据让用户决定
                 st.rerun()
 
     with col3:
         if st.button("↩️ 撤销最近操作", use_container_width=True):
-            undo_manager = UndoManager()
-            result = undo_manager.undo_latest()
+            result = _undo_manager().undo_latest()
+            _validate_cached.clear()
+            st.session_state.last_validated_key = None
             if result.success_count > 0:
                 st.session_state.message = (
                     "success",
@@ -437,13 +565,14 @@ def main():
     st.divider()
 
     # 统计信息
+    pending, total, ready = count_all(rename_json)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("总项目", count_total(rename_json))
+        st.metric("总项目", total)
     with col2:
-        st.metric("待翻译", count_pending(rename_json))
+        st.metric("待翻译", pending)
     with col3:
-        st.metric("可重命名", count_ready(rename_json))
+        st.metric("可重命名", ready)
     with col4:
         st.metric("冲突", len(st.session_state.conflicts))
 
@@ -464,34 +593,7 @@ def main():
         )
         st.session_state.base_path = Path(base_path)
 
-    # 文件树编辑
-    st.subheader("文件树")
-
-    # 获取冲突路径
-    conflict_paths = set()
-    if st.session_state.base_path:
-        validator = ConflictValidator()
-        conflicts = validator.validate(rename_json, st.session_state.base_path)
-        st.session_state.conflicts = conflicts
-        conflict_paths = {(c.src_path, c.tgt_path) for c in conflicts}
-
-    # 渲染文件树
-    new_root = []
-    for i, node in enumerate(rename_json.root):
-        new_node = render_node(
-            node,
-            st.session_state.base_path or Path.cwd(),
-            conflict_paths,
-            f"node_{i}",
-        )
-        new_root.append(new_node)
-
-    # 更新 session state
-    st.session_state.rename_json = RenameJSON(root=new_root)
-
-    # JSON 预览
-    with st.expander("JSON 预览"):
-        st.json(json.loads(st.session_state.rename_json.model_dump_json()))
+    _tree_fragment()
 
 
 if __name__ == "__main__":
@@ -11,7 +11,7 @@ from rich.console import Console
 from rich.table import Table
 
 from trename.clipboard import ClipboardHandler
-from trename.models import RenameJSON, count_pending, count_ready, count_total
+from trename.models import RenameJSON, count_all, count_total
 from trename.renamer import FileRenamer
 from trename.scanner import FileScanner
 from trename.undo import UndoManager
@@ -61,18 +61,12 @@ def scan(
     ] = False,
 ) -> None:
     """扫描目录生成 JSON 结构（支持多文件夹合并）"""
-    from trename.scanner import split_json
+    from trename.scanner import parse_exclude_exts, split_json
 
     try:
         # 解析排除扩展名
-        exclude_exts: set[str] = set()
-        if exclude:
-            exclude_exts = {
-                ext.strip() if ext.strip().startswith(".") else f".{ext.strip()}"
-                for ext in exclude.split(",")
-                if ext.strip()
-            }
-        
+        exclude_exts = parse_exclude_exts(exclude or "")
+
         # 解析排除模式
         exclude_patterns: list[str] = []
         if exclude_pattern:
@@ -86,11 +80,8 @@ def scan(
 
         # 扫描所有目录并合并
         rename_json = RenameJSON(root=[])
-        for directory in directories:
-            if include_root:
-                result = scanner.scan_as_single_dir(directory)
-            else:
-                result = scanner.scan(directory)
+        results = scanner.scan_many(directories, as_single_dir=include_root)
+        for directory, result in zip(directories, results):
             rename_json.root.extend(result.root)
             console.print(f"  扫描: {directory} ({count_total(result)} 项)")
 
@@ -177,9 +168,7 @@ def rename(
             raise typer.Exit(1)
 
         # 统计
-        total = count_total(rename_json)
-        ready = count_ready(rename_json)
-        pending = count_pending(rename_json)
+        pending, total, ready = count_all(rename_json)
 
         console.print(f"  总项目: {total}, 可重命名: {ready}, 待翻译: {pending}")
 
@@ -272,17 +261,35 @@ def undo(
 
 
 @app.command()
-def ui() -> None:
+def ui(
+    use_subprocess: Annotated[
+        bool,
+        typer.Option("--subprocess", help="在独立进程中启动（隔离 Streamlit 运行环境）"),
+    ] = False,
+) -> None:
     """启动 Streamlit 界面"""
-    import subprocess
-    import sys
-
+    app_path = str(Path(__file__).parent / "app.py")
     console.print("启动 Streamlit 界面...")
-    subprocess.run(
-        [sys.executable, "-m", "streamlit", "run", 
-         str(Path(__file__).parent / "app.py")],
-        check=True,
-    )
+
+    if use_subprocess:
+        import subprocess
+        import sys
+
+        subprocess.run(
+            [sys.executable, "-m", "streamlit", "run", app_path],
+            check=True,
+        )
+        return
+
+    # 在当前进程内启动，省去重新启动解释器和导入 Streamlit 的开销
+    from streamlit import config as st_config
+    from streamlit.web import bootstrap
+
+    # 与 streamlit run 一致：加载配置前设置主脚本路径，
+    # 使 app.py 旁的 .streamlit/config.toml 和 secrets 生效
+    st_config._main_script_path = app_path
+    bootstrap.load_config_options(flag_options={})
+    bootstrap.run(app_path, False, [], {})
 
 
 if __name__ == "__main__":
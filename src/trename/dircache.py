@@ -0,0 +1,52 @@
+"""目录内容缓存
+
+批量检查路径是否存在时使用，供冲突检测和撤销共享。
+"""
+
+import os
+import sys
+
+# macOS 默认文件系统不区分大小写且会做 Unicode 规范化，os.path.normcase 却不处理，
+# 名称集合无法可靠代替 stat
+_LISTING_RELIABLE = sys.platform != "darwin"
+
+
+class DirListingCache:
+    """按目录缓存的文件名集合
+
+    批量检查路径是否存在时，每个目录只 scandir 一次，用名称集合代替逐项 stat。
+    目录在第一次查询时才读取；调用方移动文件后应调用 moved() 同步缓存。
+    """
+
+    def __init__(self) -> None:
+        self._names: dict[str, set[str]] = {}
+
+    def _listing(self, parent: str) -> set[str]:
+        names = self._names.get(parent)
+        if names is None:
+            try:
+                with os.scandir(parent) as it:
+                    names = {os.path.normcase(entry.name) for entry in it}
+            except OSError:
+                names = set()
+            self._names[parent] = names
+        return names
+
+    def exists(self, path: str) -> bool:
+        """路径是否存在（与文件系统的大小写规则一致）"""
+        parent, name = os.path.split(path)
+        # 特殊名称和结尾为点/空格的名称（Windows 会自动去掉）交给系统判断
+        if not _LISTING_RELIABLE or name in ("", ".", "..") or name[-1] in ". ":
+            return os.path.exists(path)
+        return os.path.normcase(name) in self._listing(parent)
+
+    def moved(self, src: str, dst: str) -> None:
+        """记录一次 src -> dst 的移动"""
+        src_parent, src_name = os.path.split(src)
+        dst_parent, dst_name = os.path.split(dst)
+        self._listing(src_parent).discard(os.path.normcase(src_name))
+        self._listing(dst_parent).add(os.path.normcase(dst_name))
+        # 被移动的若是目录，其下已缓存的列表对应的路径已失效
+        prefix = src + os.sep
+        for key in [k for k in self._names if k == src or k.startswith(prefix)]:
+            del self._names[key]
@@ -127,6 +127,76 @@ class UndoResult:
 # ============ 工具函数 ============
 
 
+def count_all(node: RenameNode | RenameJSON) -> tuple[int, int, int]:
+    """一次遍历同时统计待翻译、总数和可重命名数量
+
+    Args:
+        node: RenameNode 或 RenameJSON 对象
+
+    Returns:
+        (待翻译数量, 总项目数量, 可重命名数量)
+    """
+    pending = total = ready = 0
+    stack: list[RenameNode] = list(node.root) if isinstance(node, RenameJSON) else [node]
+
+    while stack:
+        current = stack.pop()
+        if isinstance(current, FileNode):
+            src, tgt = current.src, current.tgt
+        else:  # DirNode
+            src, tgt = current.src_dir, current.tgt_dir
+            stack.extend(current.children)
+        total += 1
+        # 直接比较字段，等价于 is_pending / is_ready
+        if tgt == "":
+            pending += 1
+        elif tgt != src:
+            ready += 1
+
+    return pending, total, ready
+
+
+def ready_dir_ids(node: RenameNode | RenameJSON) -> set[int]:
+    """找出子树中含有可重命名项的目录节点
+
+    遍历时可以跳过不在集合中的目录，整棵子树都无需处理。
+
+    Args:
+        node: RenameNode 或 RenameJSON 对象
+
+    Returns:
+        目录本身或其任一后代可重命名的 DirNode 的 id() 集合
+    """
+    ready: set[int] = set()
+    roots = node.root if isinstance(node, RenameJSON) else [node]
+    # (目录节点, 子节点是否已处理)；后序遍历，子目录先于父目录判定
+    stack: list[tuple[DirNode, bool]] = [
+        (n, False) for n in roots if isinstance(n, DirNode)
+    ]
+
+    while stack:
+        current, done = stack.pop()
+        if not done:
+            stack.append((current, True))
+            stack.extend(
+                (c, False) for c in current.children if not isinstance(c, FileNode)
+            )
+            continue
+        if current.tgt_dir != "" and current.tgt_dir != current.src_dir:
+            ready.add(id(current))
+            continue
+        for child in current.children:
+            if isinstance(child, FileNode):
+                if child.tgt != "" and child.tgt != child.src:
+                    ready.add(id(current))
+                    break
+            elif id(child) in ready:
+                ready.add(id(current))
+                break
+
+    return ready
+
+
 def count_pending(node: RenameNode | RenameJSON) -> int:
     """计算待翻译项目数量
 
@@ -136,44 +206,14 @@ def count_pending(node: RenameNode | RenameJSON) -> int:
     Returns:
         待翻译项目数量
     """
-    if isinstance(node, RenameJSON):
-        return sum(count_pending(child) for child in node.root)
-
-    if isinstance(node, FileNode):
-        return 1 if node.is_pending else 0
-
-    # DirNode
-    count = 1 if node.is_pending else 0
-    for child in node.children:
-        count += count_pending(child)
-    return count
+    return count_all(node)[0]
 
 
 def count_total(node: RenameNode | RenameJSON) -> int:
     """计算总项目数量"""
-    if isinstance(node, RenameJSON):
-        return sum(count_total(child) for child in node.root)
-
-    if isinstance(node, FileNode):
-        return 1
-
-    # DirNode
-    count = 1
-    for child in node.children:
-        count += count_total(child)
-    return count
+    return count_all(node)[1]
 
 
 def count_ready(node: RenameNode | RenameJSON) -> int:
     """计算可重命名项目数量"""
-    if isinstance(node, RenameJSON):
-        return sum(count_ready(child) for child in node.root)
-
-    if isinstance(node, FileNode):
-        return 1 if node.is_ready else 0
-
-    # DirNode
-    count = 1 if node.is_ready else 0
-    for child in node.children:
-        count += count_ready(child)
-    return count
+    return count_all(node)[2]
@@ -3,8 +3,11 @@
 执行批量重命名操作，支持撤销。
 """
 
+import errno
 import logging
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -15,6 +18,7 @@ from trename.models import (
     RenameNode,
     RenameOperation,
     RenameResult,
+    ready_dir_ids,
 )
 from trename.validator import ConflictValidator
 
@@ -23,6 +27,32 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# 并发重命名的最大线程数（重命名以 I/O 等待为主）
+MAX_WORKERS = 32
+
+
+def _group_by_depth(
+    operations: list[tuple[Path, Path]],
+) -> list[list[tuple[Path, Path]]]:
+    """按源路径深度分组，深的在前
+
+    同一深度的源路径互不为祖先，组内操作可以并发执行。
+    组内保持原有顺序，撤销时逆序回放仍然先恢复父目录。
+
+    Args:
+        operations: (源路径, 目标路径) 列表
+
+    Returns:
+        按深度从深到浅排列的操作分组
+    """
+    groups: dict[int, list[tuple[Path, Path]]] = {}
+    # 源路径都是由已解析的基础路径拼接而成的规范绝对路径，
+    # 数分隔符即可得到深度，不必让 Path 解析 parts
+    sep = os.sep
+    for operation in operations:
+        groups.setdefault(str(operation[0]).count(sep), []).append(operation)
+    return [groups[depth] for depth in sorted(groups, reverse=True)]
+
 
 class FileRenamer:
     """文件重命名器"""
@@ -56,7 +86,8 @@ class FileRenamer:
         """
         from trename.validator import preprocess_rename_json
         
-        base_path = Path(base_path).resolve()
+        # 基础路径由验证器统一 resolve 一次
+        base_path = Path(base_path)
         
         # 预处理：自动修复非法字符（如 : -> ：）
         rename_json, preprocess_messages = preprocess_rename_json(rename_json)
@@ -82,18 +113,22 @@ class FileRenamer:
         failed_count = 0
         executed_operations: list[RenameOperation] = []
 
-        for src_path, tgt_path in operations:
-            try:
-                if self._rename_single(src_path, tgt_path):
-                    success_count += 1
-                    executed_operations.append(
-                        RenameOperation(original_path=src_path, new_path=tgt_path)
-                    )
+        # 同一深度的操作互不为祖先，可并发执行；按深度从深到浅分组，
+        # 保证目录在其内容之后重命名
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(operations) or 1)) as executor:
+            for group in _group_by_depth(operations):
+                if len(group) == 1:
+                    results = [self._try_rename(group[0])]
                 else:
-                    failed_count += 1
-            except Exception as e:
-                logger.error(f"重命名失败 {src_path} -> {tgt_path}: {e}")
-                failed_count += 1
+                    results = executor.map(self._try_rename, group)
+                for (src_path, tgt_path), ok in zip(group, results):
+                    if ok:
+                        success_count += 1
+                        executed_operations.append(
+                            RenameOperation(original_path=src_path, new_path=tgt_path)
+                        )
+                    else:
+                        failed_count += 1
 
         # 记录撤销
         operation_id = ""
@@ -111,6 +146,15 @@ class FileRenamer:
             operation_id=operation_id,
         )
 
+    def _try_rename(self, operation: tuple[Path, Path]) -> bool:
+        """执行单个操作，异常视为失败（供线程池调用）"""
+        src_path, tgt_path = operation
+        try:
+            return self._rename_single(src_path, tgt_path)
+        except Exception as e:
+            logger.error(f"重命名失败 {src_path} -> {tgt_path}: {e}")
+            return False
+
     def _rename_single(self, src: Path, tgt: Path) -> bool:
         """重命名单个文件/目录
 
@@ -121,18 +165,24 @@ class FileRenamer:
         Returns:
             是否成功
         """
-        if not src.exists():
-            logger.warning(f"源文件不存在: {src}")
-            return False
-
         if tgt.exists():
             logger.warning(f"目标已存在: {tgt}")
             return False
 
+        # 源是否存在交给 os.replace 判断，省去一次 stat
         try:
-            shutil.move(str(src), str(tgt))
+            try:
+                os.replace(src, tgt)
+            except OSError as e:
+                # 跨设备时退回 shutil.move（复制 + 删除）
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(str(src), str(tgt))
             logger.info(f"重命名: {src.name} -> {tgt.name}")
             return True
+        except FileNotFoundError:
+            logger.warning(f"源文件不存在: {src}")
+            return False
         except Exception as e:
             logger.error(f"重命名失败: {e}")
             return False
@@ -150,23 +200,42 @@ class FileRenamer:
             (源路径, 目标路径) 列表，子项在前
         """
         operations: list[tuple[Path, Path]] = []
-        base_path = Path(base_path).resolve()
+        base_path = str(Path(base_path).resolve())
+        join = os.path.join
+        # 不含可重命名项的目录整棵跳过
+        ready_dirs = ready_dir_ids(rename_json)
+
+        # (节点, 父路径, 是否为目录的后序访问)
+        # 遍历时用字符串拼接路径，只为输出的操作构造 Path
+        stack: list[tuple[RenameNode, str, bool]] = [
+            (node, base_path, False) for node in reversed(rename_json.root)
+        ]
+
+        while stack:
+            node, parent_path, post = stack.pop()
 
-        def collect(node: RenameNode, parent_path: Path) -> None:
             if isinstance(node, FileNode):
                 if node.is_ready:
-                    operations.append((parent_path / node.src, parent_path / node.tgt))
+                    operations.append(
+                        (Path(join(parent_path, node.src)), Path(join(parent_path, node.tgt)))
+                    )
 
             elif isinstance(node, DirNode):
-                src_path = parent_path / node.src_dir
-                # 先递归处理子节点
-                for child in node.children:
-                    collect(child, src_path)
-                # 再处理目录本身
+                if post:
+                    # 子节点都已处理，再处理目录本身
+                    operations.append(
+                        (
+                            Path(join(parent_path, node.src_dir)),
+                            Path(join(parent_path, node.tgt_dir)),
+                        )
+                    )
+                    continue
+                if id(node) not in ready_dirs:
+                    continue
                 if node.is_ready:
-                    operations.append((src_path, parent_path / node.tgt_dir))
-
-        for node in rename_json.root:
-            collect(node, base_path)
+                    stack.append((node, parent_path, True))
+                src_path = join(parent_path, node.src_dir)
+                for child in reversed(node.children):
+                    stack.append((child, src_path, False))
 
         return operations
@@ -1,13 +1,17 @@
 """文件扫描器
 
-使用 pathlib 递归扫描目录，生成 RenameJSON 结构。
+使用 os.scandir 递归扫描目录，生成 RenameJSON 结构。
 """
 
 import json
 import logging
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from pydantic import TypeAdapter
+
 from trename.models import DirNode, FileNode, RenameJSON, RenameNode
 
 logger = logging.getLogger(__name__)
@@ -15,6 +19,16 @@ logger = logging.getLogger(__name__)
 # 默认排除的扩展名
 DEFAULT_EXCLUDE_EXTS = {".json", ".txt", ".html", ".htm", ".md", ".log"}
 
+# 标准库的 C 加速字符串编码（等价于 ensure_ascii=False 时的 json.dumps(str)）
+_encode_str = json.encoder.encode_basestring
+
+# 一次校验整个目录的文件节点，比逐个调用 FileNode(...) 少了每个实例的 Python 层开销
+_validate_file_nodes = TypeAdapter(list[FileNode]).validate_python
+
+# RenameJSON 的 JSON 读写入口；复用模型在导入时已构建好的 schema，
+# 绕过 model_dump_json / model_validate_json 的 Python 层包装
+_RENAME_JSON_ADAPTER: TypeAdapter[RenameJSON] = TypeAdapter(RenameJSON)
+
 # 预定义的排除模式
 PRESET_PATTERNS = {
     "processed": r"\([^)]+\s*·\s*[^)]+\)",  # 匹配 (xx · xx) 格式
@@ -22,13 +36,38 @@ PRESET_PATTERNS = {
 }
 
 
+def parse_exclude_exts(exclude_exts_str: str) -> frozenset[str]:
+    """解析逗号分隔的扩展名列表
+
+    Args:
+        exclude_exts_str: 如 ".json,.txt" 或 "json, txt"
+
+    Returns:
+        统一带前导点的扩展名集合
+    """
+    exts = (ext.strip() for ext in exclude_exts_str.split(","))
+    return frozenset(ext if ext.startswith(".") else f".{ext}" for ext in exts if ext)
+
+
+def _is_dir(entry: os.DirEntry) -> bool:
+    """条目是否为目录（跟随符号链接）
+
+    DirEntry 自带目录读取时获得的类型信息，多数情况下无需 stat；
+    无法判断时（如自引用的符号链接、权限不足）按文件处理，不影响同目录的其他条目。
+    """
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
 class FileScanner:
     """文件扫描器 - 扫描目录生成 RenameJSON"""
 
     def __init__(
         self,
         ignore_hidden: bool = True,
-        exclude_exts: set[str] | None = None,
+        exclude_exts: set[str] | frozenset[str] | None = None,
         exclude_patterns: list[str] | None = None,
     ):
         """初始化扫描器
@@ -40,7 +79,11 @@ class FileScanner:
                              支持预设: "processed" (已处理格式), "numbered" (编号格式)
         """
         self.ignore_hidden = ignore_hidden
-        self.exclude_exts = exclude_exts if exclude_exts is not None else set()
+        self.exclude_exts = frozenset(ext.lower() for ext in exclude_exts or ())
+        # 去掉前导点的小写扩展名，扫描时直接与 rpartition 的结果比较
+        self._exclude_suffixes = frozenset(
+            ext[1:] if ext.startswith(".") else ext for ext in self.exclude_exts
+        )
         
         # 编译排除模式
         self.exclude_regexes: list[re.Pattern] = []
@@ -98,9 +141,38 @@ class FileScanner:
         dir_node = self._scan_dir(root_path)
         return RenameJSON(root=[dir_node])
 
+    def scan_many(
+        self, root_paths: list[Path], as_single_dir: bool = True
+    ) -> list[RenameJSON]:
+        """并行扫描多个目录
+
+        目录遍历以 I/O 为主，各根目录在线程池中同时扫描。
+
+        Args:
+            root_paths: 要扫描的目录路径列表
+            as_single_dir: 是否将每个目录本身作为根节点
+
+        Returns:
+            与 root_paths 顺序一致的 RenameJSON 列表
+
+        Raises:
+            FileNotFoundError: 目录不存在
+            NotADirectoryError: 路径不是目录
+        """
+        if not root_paths:
+            return []
+
+        scan_fn = self.scan_as_single_dir if as_single_dir else self.scan
+        max_workers = min(len(root_paths), os.cpu_count() or 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(scan_fn, root_paths))
+
     def _scan_children(self, dir_path: Path) -> list[RenameNode]:
         """扫描目录下的所有子项
 
+        按层遍历子目录，同一层的目录在线程池中并行读取，
+        深层目录不受递归深度限制。
+
         Args:
             dir_path: 目录路径
 
@@ -108,36 +180,74 @@ class FileScanner:
             子节点列表
         """
         nodes: list[RenameNode] = []
+        # 当前层的 (待扫描目录, 其子节点列表)
+        level: list[tuple[str, list[RenameNode]]] = [(str(dir_path), nodes)]
+
+        # 同层子目录并行读取；线程池随每次扫描创建和关闭，
+        # 线程只在某一层有多个目录时才真正启动，扫描器本身不持有线程
+        with ThreadPoolExecutor(thread_name_prefix="trename-scan") as executor:
+            while level:
+                paths = [path for path, _ in level]
+                if len(paths) == 1:
+                    listings = [self._list_dir(paths[0])]
+                else:
+                    listings = executor.map(self._list_dir, paths)
+
+                next_level: list[tuple[str, list[RenameNode]]] = []
+                for (_, out), entries in zip(level, listings):
+                    files: list[dict[str, str]] = []
+                    for entry, is_dir in entries:
+                        name = entry.name
+                        if is_dir:
+                            dir_node = DirNode(src_dir=name, children=[])
+                            out.append(dir_node)
+                            next_level.append((entry.path, dir_node.children))
+                        else:
+                            # 检查扩展名排除（与 os.path.splitext 一致：前导点不算扩展名）
+                            stem, dot, suffix = name.rpartition(".")
+                            if (
+                                dot
+                                and stem.lstrip(".")
+                                and suffix.lower() in self._exclude_suffixes
+                            ):
+                                continue
+                            files.append({"src": name})
+                    # 条目已按目录在前排序，文件节点整批追加在末尾，顺序不变
+                    if files:
+                        out.extend(_validate_file_nodes(files))
+                level = next_level
 
-        try:
-            items = sorted(dir_path.iterdir(), key=lambda p: (not p.is_dir(), p.name))
-        except PermissionError:
-            logger.warning(f"权限不足，跳过目录: {dir_path}")
-            return nodes
+        return nodes
 
-        for item in items:
-            # 跳过隐藏文件
-            if self.ignore_hidden and item.name.startswith("."):
-                continue
-            
-            # 检查排除模式
-            if self._should_exclude(item.name):
-                continue
+    def _list_dir(self, path: str) -> list[tuple[os.DirEntry, bool]]:
+        """读取单个目录，返回排序并过滤后的条目
 
-            try:
-                if item.is_dir():
-                    nodes.append(self._scan_dir(item))
-                else:
-                    # 检查扩展名排除
-                    if item.suffix.lower() in self.exclude_exts:
-                        continue
-                    nodes.append(FileNode(src=item.name))
-            except PermissionError:
-                logger.warning(f"权限不足，跳过: {item}")
-            except OSError as e:
-                logger.warning(f"无法访问 {item}: {e}")
+        Args:
+            path: 目录路径
 
-        return nodes
+        Returns:
+            目录在前、按名称排序的 (条目, 是否为目录) 列表（已排除隐藏项和匹配排除模式的项）
+        """
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except PermissionError:
+            logger.warning(f"权限不足，跳过目录: {path}")
+            return []
+        except OSError as e:
+            logger.warning(f"无法访问 {path}: {e}")
+            return []
+
+        # 每个条目只判断一次类型，排序和后续处理共用
+        listing = [
+            (entry, _is_dir(entry))
+            for entry in entries
+            # 跳过隐藏文件，检查排除模式
+            if not (self.ignore_hidden and entry.name.startswith("."))
+            and not self._should_exclude(entry.name)
+        ]
+        listing.sort(key=lambda item: (not item[1], item[0].name))
+        return listing
 
     def _should_exclude(self, name: str) -> bool:
         """检查文件名是否应该被排除
@@ -175,7 +285,9 @@ class FileScanner:
         Returns:
             JSON 字符串
         """
-        return rename_json.model_dump_json(indent=indent, exclude_none=True)
+        return _RENAME_JSON_ADAPTER.dump_json(
+            rename_json, indent=indent, exclude_none=True
+        ).decode()
 
     def to_compact_json(self, rename_json: RenameJSON) -> str:
         """将 RenameJSON 序列化为紧凑 JSON（文件节点单行）
@@ -186,7 +298,7 @@ class FileScanner:
         Returns:
             紧凑格式的 JSON 字符串
         """
-        return _compact_json(rename_json.model_dump())
+        return _compact_json(rename_json)
 
     @staticmethod
     def from_json(json_str: str) -> RenameJSON:
@@ -201,55 +313,67 @@ class FileScanner:
         Raises:
             pydantic.ValidationError: JSON 格式或结构无效
         """
-        return RenameJSON.model_validate_json(json_str)
-
-
-def _compact_json(data: dict, indent: int = 0) -> str:
-    """生成紧凑格式 JSON（文件节点单行，目录节点多行）"""
-    lines = []
-    ind = "  " * indent
-
-    if "root" in data:
-        lines.append('{')
-        lines.append(f'{ind}  "root": [')
-        for i, node in enumerate(data["root"]):
-            node_str = _format_node(node, indent + 2)
-            comma = "," if i < len(data["root"]) - 1 else ""
-            lines.append(f"{node_str}{comma}")
-        lines.append(f'{ind}  ]')
-        lines.append('}')
-    return "\n".join(lines)
-
-
-def _format_node(node: dict, indent: int) -> str:
-    """格式化单个节点"""
-    ind = "  " * indent
+        return _RENAME_JSON_ADAPTER.validate_json(json_str)
 
-    # 文件节点 - 单行
-    if "src" in node:
-        return f'{ind}{{"src": "{node["src"]}", "tgt": "{node.get("tgt", "")}"}}'
 
-    # 目录节点 - 多行
-    if "src_dir" in node:
-        lines = [f'{ind}{{"src_dir": "{node["src_dir"]}", "tgt_dir": "{node.get("tgt_dir", "")}", "children": [']
-        children = node.get("children", [])
-        for i, child in enumerate(children):
-            child_str = _format_node(child, indent + 1)
-            comma = "," if i < len(children) - 1 else ""
-            lines.append(f"{child_str}{comma}")
-        lines.append(f"{ind}  ]")
-        lines.append(f"{ind}}}")
-        return "\n".join(lines)
+def _compact_json(rename_json: RenameJSON) -> str:
+    """生成紧凑格式 JSON（文件节点单行，目录节点多行）
 
-    return json.dumps(node)
+    直接遍历模型单次输出，不经过 model_dump() 的中间字典。
+    """
+    lines = ["{", '  "root": [']
+    # (节点, 缩进, 行尾逗号)；节点为 None 表示目录的结尾
+    stack: list[tuple[RenameNode | None, str, str]] = []
+    root = rename_json.root
+    last = len(root) - 1
+    for i in range(last, -1, -1):
+        stack.append((root[i], "    ", "," if i < last else ""))
+
+    while stack:
+        node, ind, comma = stack.pop()
+
+        if node is None:
+            lines.append(f"{ind}  ]")
+            lines.append(f"{ind}}}{comma}")
+        elif isinstance(node, FileNode):
+            # 文件节点 - 单行
+            lines.append(
+                f'{ind}{{"src": {_encode_str(node.src)}, "tgt": {_encode_str(node.tgt)}}}{comma}'
+            )
+        else:
+            # 目录节点 - 多行
+            lines.append(
+                f'{ind}{{"src_dir": {_encode_str(node.src_dir)}, '
+                f'"tgt_dir": {_encode_str(node.tgt_dir)}, "children": ['
+            )
+            stack.append((None, ind, comma))
+            children = node.children
+            child_ind = ind + "  "
+            last = len(children) - 1
+            for i in range(last, -1, -1):
+                stack.append((children[i], child_ind, "," if i < last else ""))
+
+    lines.append("  ]")
+    lines.append("}")
+    return "\n".join(lines)
 
 
 def count_lines(node: RenameNode) -> int:
     """计算节点序列化后的行数"""
     if isinstance(node, FileNode):
         return 1
-    # DirNode: 开头 + children + 结尾
-    return 3 + sum(count_lines(child) for child in node.children)
+    total = 0
+    stack: list[DirNode] = [node]
+    while stack:
+        current = stack.pop()
+        children = current.children
+        # 只有子目录需要入栈，文件子节点各占一行直接计数
+        # （判断 FileNode 命中精确类型的快速路径，比判断 DirNode 便宜）
+        subdirs = [child for child in children if not isinstance(child, FileNode)]
+        # DirNode: 开头 + children + 结尾
+        total += 3 + len(children) - len(subdirs)
+        stack.extend(subdirs)
+    return total
 
 
 def split_json(
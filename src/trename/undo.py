@@ -4,12 +4,15 @@
 """
 
 import logging
-import shutil
+import os
 import sqlite3
 import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+from trename.dircache import DirListingCache
 from trename.models import RenameOperation, UndoRecord, UndoResult
 
 logger = logging.getLogger(__name__)
@@ -17,20 +20,67 @@ logger = logging.getLogger(__name__)
 # 默认数据库路径
 DEFAULT_DB_PATH = Path.home() / ".trename" / "undo.db"
 
+# 常用语句（sqlite3 按 SQL 文本缓存已编译的语句，固定文本可稳定命中）
+_SQL_INSERT_BATCH = (
+    "INSERT INTO undo_batches (id, timestamp, description) VALUES (?, ?, ?)"
+)
+_SQL_INSERT_OPERATION = """INSERT INTO undo_operations 
+                   (batch_id, original_path, new_path, seq_order) 
+                   VALUES (?, ?, ?, ?)"""
+_SQL_SELECT_UNDONE = "SELECT undone FROM undo_batches WHERE id = ?"
+_SQL_SELECT_OPERATIONS_REVERSED = """SELECT original_path, new_path FROM undo_operations 
+               WHERE batch_id = ? ORDER BY seq_order DESC"""
+_SQL_MARK_UNDONE = "UPDATE undo_batches SET undone = 1 WHERE id = ?"
+_SQL_SELECT_LATEST = """SELECT id FROM undo_batches 
+               WHERE undone = 0 
+               ORDER BY timestamp DESC LIMIT 1"""
+_SQL_SELECT_HISTORY = """SELECT b.id, b.timestamp, b.description, o.original_path, o.new_path
+               FROM (SELECT id, timestamp, description FROM undo_batches 
+                     ORDER BY timestamp DESC LIMIT ?) b
+               LEFT JOIN undo_operations o ON o.batch_id = b.id
+               ORDER BY b.timestamp DESC, b.id, o.seq_order"""
+
 
 class UndoManager:
     """撤销管理器 - 使用 SQLite 存储撤销记录"""
 
-    def __init__(self, db_path: Path | None = None):
+    def __init__(
+        self, db_path: Path | None = None, check_same_thread: bool = True
+    ):
         """初始化撤销管理器
 
         Args:
             db_path: 数据库文件路径，默认为 ~/.trename/undo.db
+            check_same_thread: 是否限制连接只能在创建它的线程中使用
+                               （Streamlit 每次重跑可能在不同线程中执行）
         """
         self.db_path = db_path or DEFAULT_DB_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(str(self.db_path))
+        # 自动提交模式，事务由 _transaction 显式管理，
+        # 避免 sqlite3 模块在每条写语句前隐式 BEGIN
+        self.conn = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=check_same_thread,
+            isolation_level=None,
+        )
+        # WAL 模式下提交无需回滚日志的 fsync；NORMAL 同步级别在 WAL 下仍能保证一致性
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
         self._init_tables()
+        # 各方法复用同一个游标
+        self._cursor = self.conn.cursor()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """显式事务：正常结束时提交，异常时回滚"""
+        self._cursor.execute("BEGIN")
+        try:
+            yield self._cursor
+        except BaseException:
+            self._cursor.execute("ROLLBACK")
+            raise
+        self._cursor.execute("COMMIT")
 
     def _init_tables(self) -> None:
         """创建数据库表"""
@@ -64,7 +114,17 @@ class UndoManager:
             ON undo_operations(batch_id)
         """)
 
-        self.conn.commit()
+        # 按时间倒序取最近批次（get_history / clear_history）
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_batches_time_undone 
+            ON undo_batches(timestamp DESC, undone)
+        """)
+
+        # 取最近一个未撤销的批次（undo_latest）
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_batches_undone_time 
+            ON undo_batches(undone, timestamp DESC)
+        """)
 
     def record(
         self, operations: list[RenameOperation], description: str = ""
@@ -84,24 +144,20 @@ class UndoManager:
         batch_id = str(uuid.uuid4())[:8]
         timestamp = datetime.now().isoformat()
 
-        cursor = self.conn.cursor()
-
-        # 插入批次记录
-        cursor.execute(
-            "INSERT INTO undo_batches (id, timestamp, description) VALUES (?, ?, ?)",
-            (batch_id, timestamp, description),
-        )
-
-        # 插入操作记录（按顺序）
-        for seq, op in enumerate(operations):
-            cursor.execute(
-                """INSERT INTO undo_operations 
-                   (batch_id, original_path, new_path, seq_order) 
-                   VALUES (?, ?, ?, ?)""",
-                (batch_id, str(op.original_path), str(op.new_path), seq),
+        # 批次和操作记录在同一事务中写入
+        with self._transaction() as cursor:
+            # 插入批次记录
+            cursor.execute(_SQL_INSERT_BATCH, (batch_id, timestamp, description))
+
+            # 插入操作记录（按顺序）
+            cursor.executemany(
+                _SQL_INSERT_OPERATION,
+                (
+                    (batch_id, os.fspath(op.original_path), os.fspath(op.new_path), seq)
+                    for seq, op in enumerate(operations)
+                ),
             )
 
-        self.conn.commit()
         logger.info(f"记录撤销批次 {batch_id}: {len(operations)} 个操作")
         return batch_id
 
@@ -116,12 +172,10 @@ class UndoManager:
         Returns:
             撤销结果
         """
-        cursor = self.conn.cursor()
+        cursor = self._cursor
 
         # 检查批次是否存在且未撤销
-        cursor.execute(
-            "SELECT undone FROM undo_batches WHERE id = ?", (batch_id,)
-        )
+        cursor.execute(_SQL_SELECT_UNDONE, (batch_id,))
         row = cursor.fetchone()
 
         if not row:
@@ -139,43 +193,41 @@ class UndoManager:
             )
 
         # 获取操作记录（逆序）
-        cursor.execute(
-            """SELECT original_path, new_path FROM undo_operations 
-               WHERE batch_id = ? ORDER BY seq_order DESC""",
-            (batch_id,),
-        )
+        cursor.execute(_SQL_SELECT_OPERATIONS_REVERSED, (batch_id,))
         operations = cursor.fetchall()
 
         success_count = 0
         failed_count = 0
         failed_items: list[tuple[Path, Path, str]] = []
 
-        # 执行撤销（从新路径移回原路径）
-        for original_path_str, new_path_str in operations:
-            original_path = Path(original_path_str)
-            new_path = Path(new_path_str)
+        # 每个目录只读取一次，用名称集合代替逐项 stat
+        listings = DirListingCache()
 
+        # 执行撤销（从新路径移回原路径）
+        # 数据库中存的就是字符串，直接用于系统调用，仅在失败时构造 Path
+        for original_path, new_path in operations:
             try:
-                if new_path.exists():
-                    shutil.move(str(new_path), str(original_path))
+                if listings.exists(new_path):
+                    # 同目录内改名，不需要 shutil.move 的额外检查和跨设备复制
+                    os.rename(new_path, original_path)
+                    listings.moved(new_path, original_path)
                     success_count += 1
-                    logger.info(f"撤销: {new_path.name} -> {original_path.name}")
+                    logger.info(
+                        f"撤销: {os.path.basename(new_path)} -> {os.path.basename(original_path)}"
+                    )
                 else:
                     # 文件可能已被移动或删除
                     failed_count += 1
                     failed_items.append(
-                        (original_path, new_path, f"文件不存在: {new_path}")
+                        (Path(original_path), Path(new_path), f"文件不存在: {new_path}")
                     )
             except Exception as e:
                 failed_count += 1
-                failed_items.append((original_path, new_path, str(e)))
+                failed_items.append((Path(original_path), Path(new_path), str(e)))
                 logger.error(f"撤销失败 {new_path} -> {original_path}: {e}")
 
-        # 标记批次为已撤销
-        cursor.execute(
-            "UPDATE undo_batches SET undone = 1 WHERE id = ?", (batch_id,)
-        )
-        self.conn.commit()
+        # 标记批次为已撤销（单条语句，自动提交）
+        cursor.execute(_SQL_MARK_UNDONE, (batch_id,))
 
         return UndoResult(
             success_count=success_count,
@@ -189,12 +241,8 @@ class UndoManager:
         Returns:
             撤销结果
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """SELECT id FROM undo_batches 
-               WHERE undone = 0 
-               ORDER BY timestamp DESC LIMIT 1"""
-        )
+        cursor = self._cursor
+        cursor.execute(_SQL_SELECT_LATEST)
         row = cursor.fetchone()
 
         if not row:
@@ -215,38 +263,29 @@ class UndoManager:
         Returns:
             撤销记录列表
         """
-        cursor = self.conn.cursor()
+        cursor = self._cursor
 
-        # 获取批次
-        cursor.execute(
-            """SELECT id, timestamp, description, undone FROM undo_batches 
-               ORDER BY timestamp DESC LIMIT ?""",
-            (limit,),
-        )
-        batches = cursor.fetchall()
+        # 一次查询取回最近的批次及其全部操作，避免逐批次查询
+        cursor.execute(_SQL_SELECT_HISTORY, (limit,))
 
         records: list[UndoRecord] = []
+        current: UndoRecord | None = None
 
-        for batch_id, timestamp_str, description, undone in batches:
-            # 获取该批次的操作
-            cursor.execute(
-                """SELECT original_path, new_path FROM undo_operations 
-                   WHERE batch_id = ? ORDER BY seq_order""",
-                (batch_id,),
-            )
-            ops = [
-                RenameOperation(original_path=Path(orig), new_path=Path(new))
-                for orig, new in cursor.fetchall()
-            ]
-
-            records.append(
-                UndoRecord(
+        for batch_id, timestamp_str, description, orig, new in cursor:
+            # 按批次分组（结果已按批次连续排列）
+            if current is None or current.id != batch_id:
+                current = UndoRecord(
                     id=batch_id,
                     timestamp=datetime.fromisoformat(timestamp_str),
-                    operations=ops,
+                    operations=[],
                     description=description or "",
                 )
-            )
+                records.append(current)
+            # LEFT JOIN：没有操作的批次只有一行空值
+            if orig is not None:
+                current.operations.append(
+                    RenameOperation(original_path=Path(orig), new_path=Path(new))
+                )
 
         return records
 
@@ -259,33 +298,31 @@ class UndoManager:
         Returns:
             删除的记录数量
         """
-        cursor = self.conn.cursor()
-
-        if keep_recent > 0:
-            # 获取要保留的批次 ID
-            cursor.execute(
-                """SELECT id FROM undo_batches 
-                   ORDER BY timestamp DESC LIMIT ?""",
-                (keep_recent,),
-            )
-            keep_ids = [row[0] for row in cursor.fetchall()]
-
-            if keep_ids:
-                placeholders = ",".join("?" * len(keep_ids))
+        with self._transaction() as cursor:
+            if keep_recent > 0:
+                # 获取要保留的批次 ID
                 cursor.execute(
-                    f"DELETE FROM undo_operations WHERE batch_id NOT IN ({placeholders})",
-                    keep_ids,
+                    """SELECT id FROM undo_batches 
+                       ORDER BY timestamp DESC LIMIT ?""",
+                    (keep_recent,),
                 )
-                cursor.execute(
-                    f"DELETE FROM undo_batches WHERE id NOT IN ({placeholders})",
-                    keep_ids,
-                )
-        else:
-            cursor.execute("DELETE FROM undo_operations")
-            cursor.execute("DELETE FROM undo_batches")
+                keep_ids = [row[0] for row in cursor.fetchall()]
+
+                if keep_ids:
+                    placeholders = ",".join("?" * len(keep_ids))
+                    cursor.execute(
+                        f"DELETE FROM undo_operations WHERE batch_id NOT IN ({placeholders})",
+                        keep_ids,
+                    )
+                    cursor.execute(
+                        f"DELETE FROM undo_batches WHERE id NOT IN ({placeholders})",
+                        keep_ids,
+                    )
+            else:
+                cursor.execute("DELETE FROM undo_operations")
+                cursor.execute("DELETE FROM undo_batches")
 
-        deleted = cursor.rowcount
-        self.conn.commit()
+            deleted = cursor.rowcount
         return deleted
 
     def close(self) -> None:
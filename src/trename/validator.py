@@ -3,10 +3,13 @@
 检测重命名操作中的冲突：目标已存在、重复目标、非法字符等。
 """
 
+import os
 import re
 from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 
+from trename.dircache import DirListingCache
 from trename.models import (
     Conflict,
     ConflictType,
@@ -14,11 +17,16 @@ from trename.models import (
     FileNode,
     RenameJSON,
     RenameNode,
+    ready_dir_ids,
 )
 
 # Windows 文件名非法字符
 ILLEGAL_CHARS = r'/\:*?"<>|'
 ILLEGAL_CHARS_PATTERN = re.compile(r'[/\\:*?"<>|]')
+# 用于快速判断是否含非法字符（绝大多数文件名不含）
+_ILLEGAL_CHAR_SET = frozenset(ILLEGAL_CHARS)
+# 拼接后可能被 Path 规范化（分隔符、盘符）的字符
+_PATH_SPECIAL_CHARS = frozenset('/\\:')
 
 # 字符替换映射（全角替换）
 CHAR_REPLACEMENT_MAP = {
@@ -33,6 +41,32 @@ CHAR_REPLACEMENT_MAP = {
     '|': '｜',   # 全角竖线
 }
 
+# 名称检查结果的缓存容量（同名目标在大目录树中经常重复出现）
+_NAME_CACHE_SIZE = 4096
+
+# 名称验证中发现的错误：(冲突类型, 消息)，在产生处即分类，调用方无需再解析消息文本
+_NameErrors = tuple[tuple[ConflictType, str], ...]
+
+# 非法字符到全角字符的转换表
+_TRANSLATE_TABLE = str.maketrans(CHAR_REPLACEMENT_MAP)
+
+# 常见扩展名列表（小写）
+_COMMON_EXTS: frozenset[str] = frozenset({
+    '.txt', '.json', '.xml', '.html', '.htm', '.css', '.js', '.ts',
+    '.py', '.java', '.cpp', '.c', '.h', '.hpp', '.cs', '.go', '.rs',
+    '.md', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.conf',
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.avif', '.svg',
+    '.mp3', '.mp4', '.avi', '.mkv', '.mov', '.wav', '.flac',
+    '.zip', '.rar', '.7z', '.tar', '.gz', '.bz2',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.exe', '.dll', '.so', '.dylib', '.bin',
+    '.log', '.bak', '.tmp', '.cache',
+})
+
+# 点之后 "扩展名 + 后缀" 的片段，如 ".txt_backup"、".zip [xx]"
+# 后缀一直延伸到下一个点之前，一次扫描整个文件名即可找出所有片段
+_EXT_SUFFIX_PATTERN = re.compile(r'\.([a-zA-Z0-9]+)([\[_\-\( ][^.]+)')
+
 
 def sanitize_filename(name: str, is_dir: bool = False) -> tuple[str, list[str]]:
     """清理文件名中的非法字符
@@ -44,15 +78,25 @@ def sanitize_filename(name: str, is_dir: bool = False) -> tuple[str, list[str]]:
     Returns:
         (清理后的文件名, 警告消息列表)
     """
+    sanitized, warnings, _ = _sanitize_filename(name, is_dir)
+    return sanitized, list(warnings)
+
+
+@lru_cache(maxsize=_NAME_CACHE_SIZE)
+def _sanitize_filename(
+    name: str, is_dir: bool
+) -> tuple[str, tuple[str, ...], _NameErrors]:
+    """sanitize_filename 的实现，结果按 (name, is_dir) 缓存
+
+    Returns:
+        (清理后的文件名, 警告消息元组, 其中的错误)
+    """
+    # 不含非法字符时直接返回，不必运行正则
+    if not name or _ILLEGAL_CHAR_SET.isdisjoint(name):
+        return name, (), ()
+
     warnings: list[str] = []
-    
-    if not name:
-        return name, warnings
-    
-    # 检测非法字符
     found_chars = ILLEGAL_CHARS_PATTERN.findall(name)
-    if not found_chars:
-        return name, warnings
     
     # 分离文件名和扩展名（仅对文件处理）
     if not is_dir and '.' in name:
@@ -64,32 +108,30 @@ def sanitize_filename(name: str, is_dir: bool = False) -> tuple[str, list[str]]:
         # 检查扩展名中是否有非法字符
         ext_illegal = ILLEGAL_CHARS_PATTERN.findall(ext)
         if ext_illegal:
-            warnings.append(
+            error = (
                 f"[ERROR] 扩展名 '{ext}' 包含非法字符 {ext_illegal}，"
                 f"请检查文件名格式。扩展名不应包含: {ILLEGAL_CHARS}"
             )
             # 扩展名中的非法字符不自动替换，返回原名
-            return name, warnings
+            return name, (error,), ((ConflictType.ILLEGAL_CHARS, error),)
     else:
         base_name = name
         ext = ""
     
-    # 替换基础名中的非法字符
-    sanitized_base = base_name
-    replaced_chars: list[str] = []
-    
-    for char in found_chars:
-        if char in base_name:
-            replacement = CHAR_REPLACEMENT_MAP.get(char, '_')
-            sanitized_base = sanitized_base.replace(char, replacement)
-            replaced_chars.append(f"'{char}' -> '{replacement}'")
+    # 替换基础名中的非法字符（一次 translate 完成全部替换）
+    sanitized_base = base_name.translate(_TRANSLATE_TABLE)
+    replaced_chars = [
+        f"'{char}' -> '{CHAR_REPLACEMENT_MAP[char]}'"
+        for char in found_chars
+        if char in base_name
+    ]
     
     if replaced_chars:
         warnings.append(
             f"[AUTO-FIX] 文件名包含非法字符，已自动替换: {', '.join(replaced_chars)}"
         )
     
-    return sanitized_base + ext, warnings
+    return sanitized_base + ext, tuple(warnings), ()
 
 
 def validate_extension_position(name: str) -> list[str]:
@@ -111,43 +153,22 @@ def validate_extension_position(name: str) -> list[str]:
     if not name or '.' not in name:
         return errors
     
-    # 常见扩展名列表
-    common_exts = {
-        '.txt', '.json', '.xml', '.html', '.htm', '.css', '.js', '.ts',
-        '.py', '.java', '.cpp', '.c', '.h', '.hpp', '.cs', '.go', '.rs',
-        '.md', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.conf',
-        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.avif', '.svg',
-        '.mp3', '.mp4', '.avi', '.mkv', '.mov', '.wav', '.flac',
-        '.zip', '.rar', '.7z', '.tar', '.gz', '.bz2',
-        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-        '.exe', '.dll', '.so', '.dylib', '.bin',
-        '.log', '.bak', '.tmp', '.cache',
-    }
-    
-    # 找到所有点的位置
-    parts = name.split('.')
-    if len(parts) < 2:
-        return errors
-    
     # 检查是否有扩展名后跟非扩展名内容
-    # 例如: "file.txt_backup" -> parts = ['file', 'txt_backup']
-    # 例如: "file.txt[backup]" -> parts = ['file', 'txt[backup]']
-    for i, part in enumerate(parts[1:], 1):
-        # 检查这个部分是否像 "ext_suffix" 格式
-        # 支持的分隔符: _ - [ ( 以及空格后跟任何内容
-        # 例如: "zip [蠢沫沫]" 中的 "zip" 是扩展名，" [蠢沫沫]" 是后缀
-        suffix_match = re.match(r'^([a-zA-Z0-9]+)([\[_\-\( ].+)$', part)
-        if suffix_match:
-            ext_part = suffix_match.group(1)
-            suffix_part = suffix_match.group(2)
-            potential_ext = '.' + ext_part
-            if potential_ext.lower() in common_exts:
-                errors.append(
-                    f"[ERROR] 检测到扩展名后有后缀: '{name}'\n"
-                    f"  问题: 扩展名 '{potential_ext}' 后面不应添加后缀 '{suffix_part.strip()}'\n"
-                    f"  建议: 将后缀移到扩展名前面\n"
-                    f"  示例: 'file{suffix_part}{potential_ext}' 而不是 'file{potential_ext}{suffix_part}'"
-                )
+    # 例如: "file.txt_backup" 中的 ".txt_backup"
+    # 例如: "file.txt[backup]" 中的 ".txt[backup]"
+    # 支持的分隔符: _ - [ ( 以及空格后跟任何内容
+    # 例如: "zip [蠢沫沫]" 中的 "zip" 是扩展名，" [蠢沫沫]" 是后缀
+    for suffix_match in _EXT_SUFFIX_PATTERN.finditer(name):
+        ext_part = suffix_match.group(1)
+        suffix_part = suffix_match.group(2)
+        potential_ext = '.' + ext_part
+        if potential_ext.lower() in _COMMON_EXTS:
+            errors.append(
+                f"[ERROR] 检测到扩展名后有后缀: '{name}'\n"
+                f"  问题: 扩展名 '{potential_ext}' 后面不应添加后缀 '{suffix_part.strip()}'\n"
+                f"  建议: 将后缀移到扩展名前面\n"
+                f"  示例: 'file{suffix_part}{potential_ext}' 而不是 'file{potential_ext}{suffix_part}'"
+            )
     
     return errors
 
@@ -168,18 +189,39 @@ def validate_target_name(tgt: str, src: str, is_dir: bool = False) -> tuple[str,
     Returns:
         (处理后的目标名, 消息列表)
     """
-    messages: list[str] = []
-    
     if not tgt:
-        return tgt, messages
+        return tgt, []
+
+    sanitized, messages, _ = _validate_target_name(tgt, _src_ext(src), is_dir)
+    return sanitized, list(messages)
+
+
+def _src_ext(src: str) -> str:
+    """源文件名的小写扩展名（含点），没有扩展名时为空字符串
+
+    验证目标名时源文件名只用到扩展名，以它作缓存键，不同源文件的相同目标名可以共享结果。
+    """
+    return src[src.rfind('.'):].lower() if '.' in src else ''
+
+
+@lru_cache(maxsize=_NAME_CACHE_SIZE)
+def _validate_target_name(
+    tgt: str, src_ext: str, is_dir: bool
+) -> tuple[str, tuple[str, ...], _NameErrors]:
+    """validate_target_name 的实现，结果按 (tgt, 源扩展名, is_dir) 缓存
+
+    Returns:
+        (处理后的目标名, 消息元组, 其中的错误)
+    """
+    messages: list[str] = []
     
     # 1. 清理非法字符
-    sanitized, char_warnings = sanitize_filename(tgt, is_dir)
+    sanitized, char_warnings, char_errors = _sanitize_filename(tgt, is_dir)
     messages.extend(char_warnings)
     
     # 如果有扩展名错误，直接返回
-    if any('[ERROR]' in w for w in char_warnings):
-        return tgt, messages
+    if char_errors:
+        return tgt, tuple(messages), char_errors
     
     # 2. 验证扩展名位置（仅对文件）
     if not is_dir:
@@ -187,15 +229,86 @@ def validate_target_name(tgt: str, src: str, is_dir: bool = False) -> tuple[str,
         messages.extend(ext_errors)
         
         # 3. 检查扩展名是否与源文件一致
-        if '.' in src and '.' in sanitized:
-            src_ext = src[src.rfind('.'):].lower()
+        if src_ext and '.' in sanitized:
             tgt_ext = sanitized[sanitized.rfind('.'):].lower()
             if src_ext != tgt_ext:
                 messages.append(
                     f"[WARNING] 扩展名变更: '{src_ext}' -> '{tgt_ext}'，请确认是否正确"
                 )
-    
-    return sanitized, messages
+
+        return sanitized, tuple(messages), tuple(
+            (ConflictType.INVALID_EXTENSION, error) for error in ext_errors
+        )
+
+    return sanitized, tuple(messages), ()
+
+
+def _join_path(parent: str, name: str) -> str:
+    """拼接父路径和名称，结果与 str(Path(parent) / name) 一致
+
+    普通名称直接拼接即可；含分隔符、冒号或为空/"." 的名称交给 Path 规范化。
+    """
+    path = os.path.join(parent, name)
+    if not name or name == '.' or not _PATH_SPECIAL_CHARS.isdisjoint(name):
+        return str(Path(path))
+    return path
+
+
+def _flatten_ready(
+    rename_json: RenameJSON, base_path: str
+) -> tuple[list[str], list[str], list[str], list[bool], list[int]]:
+    """把可重命名的节点展开为平行数组
+
+    按先序排列（与逐节点检测时冲突的顺序一致），不含可重命名项的目录整棵跳过。
+
+    Args:
+        rename_json: RenameJSON 结构
+        base_path: 已解析的基础路径
+
+    Returns:
+        (父目录路径, 源名称, 目标名称, 是否为目录, 操作顺序)
+        前四项按下标对应同一节点；操作顺序为子项先于父目录的下标列表
+    """
+    parents: list[str] = []
+    srcs: list[str] = []
+    tgts: list[str] = []
+    is_dirs: list[bool] = []
+    op_order: list[int] = []
+    join = os.path.join
+    ready_dirs = ready_dir_ids(rename_json)
+
+    # (节点, 父路径, 目录后序访问时的下标)
+    stack: list[tuple[RenameNode | None, str, int]] = [
+        (node, base_path, -1) for node in reversed(rename_json.root)
+    ]
+
+    while stack:
+        node, parent_path, post_index = stack.pop()
+
+        if node is None:
+            # 子节点都已处理，再处理目录本身
+            op_order.append(post_index)
+
+        elif isinstance(node, FileNode):
+            if node.is_ready:
+                op_order.append(len(parents))
+                parents.append(parent_path)
+                srcs.append(node.src)
+                tgts.append(node.tgt)
+                is_dirs.append(False)
+
+        elif id(node) in ready_dirs:
+            if node.is_ready:
+                stack.append((None, parent_path, len(parents)))
+                parents.append(parent_path)
+                srcs.append(node.src_dir)
+                tgts.append(node.tgt_dir)
+                is_dirs.append(True)
+            src_path = join(parent_path, node.src_dir)
+            for child in reversed(node.children):
+                stack.append((child, src_path, -1))
+
+    return parents, srcs, tgts, is_dirs, op_order
 
 
 class ConflictValidator:
@@ -211,146 +324,137 @@ class ConflictValidator:
         Returns:
             冲突列表
         """
-        conflicts: list[Conflict] = []
-        base_path = Path(base_path).resolve()
-
-        # 收集所有目标路径用于检测重复
-        target_paths: dict[Path, list[Path]] = defaultdict(list)
+        return self._validate(rename_json, base_path)[0]
 
-        # 递归检测
-        for node in rename_json.root:
-            self._validate_node(node, base_path, conflicts, target_paths)
-
-        # 检测重复目标
-        conflicts.extend(self._check_duplicate_targets(target_paths))
-
-        return conflicts
-
-    def _validate_node(
-        self,
-        node: RenameNode,
-        parent_path: Path,
-        conflicts: list[Conflict],
-        target_paths: dict[Path, list[Path]],
-    ) -> None:
-        """递归验证节点
+    def _validate(
+        self, rename_json: RenameJSON, base_path: Path
+    ) -> tuple[list[Conflict], list[tuple[str, str]]]:
+        """一次遍历同时检测冲突和收集候选操作
 
         Args:
-            node: 当前节点
-            parent_path: 父目录路径
-            conflicts: 冲突列表（会被修改）
-            target_paths: 目标路径映射（会被修改）
+            rename_json: RenameJSON 结构
+            base_path: 基础路径
+
+        Returns:
+            (冲突列表, 候选操作列表（子项在前，路径为与 str(Path) 一致的字符串）)
         """
-        if isinstance(node, FileNode):
-            src_path = parent_path / node.src
-            if node.is_ready:
-                # 验证目标文件名
-                sanitized_tgt, messages = validate_target_name(node.tgt, node.src, is_dir=False)
-                
-                # 处理验证消息
-                for msg in messages:
-                    if '[ERROR]' in msg:
-                        conflicts.append(
-                            Conflict(
-                                type=ConflictType.ILLEGAL_CHARS if '非法字符' in msg else ConflictType.INVALID_EXTENSION,
-                                src_path=src_path,
-                                tgt_path=parent_path / node.tgt,
-                                message=msg,
-                            )
-                        )
-                
-                tgt_path = parent_path / sanitized_tgt
-                # 检查目标是否已存在
-                if self._check_target_exists(src_path, tgt_path):
-                    conflicts.append(
-                        Conflict(
-                            type=ConflictType.TARGET_EXISTS,
-                            src_path=src_path,
-                            tgt_path=tgt_path,
-                            message=f"目标文件已存在: {tgt_path}",
-                        )
-                    )
-                # 记录目标路径
-                target_paths[tgt_path].append(src_path)
+        conflicts: list[Conflict] = []
+        # 路径都用字符串拼接，只在生成冲突和操作时构造 Path
+        parents, srcs, tgts, is_dirs, op_order = _flatten_ready(
+            rename_json, str(Path(base_path).resolve())
+        )
 
-        elif isinstance(node, DirNode):
-            src_path = parent_path / node.src_dir
-            current_path = src_path  # 用于子节点的路径计算
+        # 重复目标在检测中即时发现
+        # 键为 normcase 后的目标路径（与 Path 的相等判断一致）
+        # first_targets: 首次出现的 (源路径, 目标路径)；dup_targets: 已重复的目标
+        first_targets: dict[str, tuple[str, str]] = {}
+        dup_targets: dict[str, Path] = {}
+        # 每次检测重新读取目录，文件系统可能已在外部变化
+        listings = DirListingCache()
+        join = os.path.join
+        normcase = os.path.normcase
+
+        for parent_path, src, tgt, is_dir in zip(parents, srcs, tgts, is_dirs):
+            src_path = join(parent_path, src)
+            # 验证目标名
+            sanitized_tgt, _, errors = _validate_target_name(
+                tgt, _src_ext(src), is_dir
+            )
 
-            if node.is_ready:
-                # 验证目标目录名
-                sanitized_tgt, messages = validate_target_name(node.tgt_dir, node.src_dir, is_dir=True)
-                
-                # 处理验证消息
-                for msg in messages:
-                    if '[ERROR]' in msg:
-                        conflicts.append(
-                            Conflict(
-                                type=ConflictType.ILLEGAL_CHARS,
-                                src_path=src_path,
-                                tgt_path=parent_path / node.tgt_dir,
-                                message=msg,
-                            )
-                        )
-                
-                tgt_path = parent_path / sanitized_tgt
-                # 检查目标是否已存在
-                if self._check_target_exists(src_path, tgt_path):
+            # 处理验证错误（只有出现错误时才构造路径）
+            if errors:
+                err_src = Path(src_path)
+                err_tgt = Path(join(parent_path, tgt))
+                for conflict_type, msg in errors:
                     conflicts.append(
                         Conflict(
-                            type=ConflictType.TARGET_EXISTS,
-                            src_path=src_path,
-                            tgt_path=tgt_path,
-                            message=f"目标目录已存在: {tgt_path}",
+                            type=conflict_type,
+                            src_path=err_src,
+                            tgt_path=err_tgt,
+                            message=msg,
                         )
                     )
-                # 记录目标路径
-                target_paths[tgt_path].append(src_path)
-
-            # 递归处理子节点
-            for child in node.children:
-                self._validate_node(child, current_path, conflicts, target_paths)
 
-    def _check_target_exists(self, src_path: Path, tgt_path: Path) -> bool:
+            tgt_path = join(parent_path, sanitized_tgt)
+            # 检查目标是否已存在
+            if self._check_target_exists(src_path, tgt_path, listings):
+                kind = "目录" if is_dir else "文件"
+                conflicts.append(
+                    Conflict(
+                        type=ConflictType.TARGET_EXISTS,
+                        src_path=Path(src_path),
+                        tgt_path=Path(tgt_path),
+                        message=f"目标{kind}已存在: {Path(tgt_path)}",
+                    )
+                )
+            # 记录目标路径并检测重复：目标首次出现（绝大多数情况）时只有一次字典操作
+            key = normcase(tgt_path)
+            entry = (src_path, tgt_path)
+            first = first_targets.setdefault(key, entry)
+            if first is not entry:
+                self._record_duplicate(key, src_path, first, conflicts, dup_targets)
+
+        # 候选操作按子项优先的顺序输出，目标使用原始目标名
+        operations = [
+            (_join_path(parents[i], srcs[i]), _join_path(parents[i], tgts[i]))
+            for i in op_order
+        ]
+
+        return conflicts, operations
+
+    def _check_target_exists(
+        self, src_path: str, tgt_path: str, listings: DirListingCache
+    ) -> bool:
         """检查目标路径是否已存在（且不是源路径本身）
 
         Args:
             src_path: 源路径
             tgt_path: 目标路径
+            listings: 目录内容缓存
 
         Returns:
             目标是否已存在
         """
-        if src_path == tgt_path:
+        # 与 Path 的相等判断一致：Windows 下不区分大小写
+        if os.path.normcase(src_path) == os.path.normcase(tgt_path):
             return False
-        return tgt_path.exists()
+        return listings.exists(tgt_path)
 
-    def _check_duplicate_targets(
-        self, target_paths: dict[Path, list[Path]]
-    ) -> list[Conflict]:
-        """检查重复目标
+    def _record_duplicate(
+        self,
+        key: str,
+        src_path: str,
+        first: tuple[str, str],
+        conflicts: list[Conflict],
+        dup_targets: dict[str, Path],
+    ) -> None:
+        """目标路径重复出现时生成重复目标冲突
 
-        Args:
-            target_paths: 目标路径到源路径列表的映射
+        第二次出现时同时为首次出现的源补上冲突，之后每次出现追加一条。
 
-        Returns:
-            重复目标冲突列表
+        Args:
+            key: normcase 后的目标路径
+            src_path: 本次出现的源路径
+            first: 首次出现的 (源路径, 目标路径)
+            conflicts: 冲突列表（会被修改）
+            dup_targets: 已重复的目标路径（会被修改）
         """
-        conflicts: list[Conflict] = []
-
-        for tgt_path, src_paths in target_paths.items():
-            if len(src_paths) > 1:
-                for src_path in src_paths:
-                    conflicts.append(
-                        Conflict(
-                            type=ConflictType.DUPLICATE_TARGET,
-                            src_path=src_path,
-                            tgt_path=tgt_path,
-                            message=f"多个源映射到同一目标: {tgt_path}",
-                        )
-                    )
-
-        return conflicts
+        # 同一目标以首次出现的写法为准
+        dup_tgt = dup_targets.get(key)
+        if dup_tgt is None:
+            dup_tgt = dup_targets[key] = Path(first[1])
+            conflicts.append(self._duplicate_conflict(first[0], dup_tgt))
+        conflicts.append(self._duplicate_conflict(src_path, dup_tgt))
+
+    @staticmethod
+    def _duplicate_conflict(src_path: str, tgt_path: Path) -> Conflict:
+        """构造重复目标冲突"""
+        return Conflict(
+            type=ConflictType.DUPLICATE_TARGET,
+            src_path=Path(src_path),
+            tgt_path=tgt_path,
+            message=f"多个源映射到同一目标: {tgt_path}",
+        )
 
     def get_valid_operations(
         self, rename_json: RenameJSON, base_path: Path, smart_dedup: bool = True
@@ -365,7 +469,7 @@ class ConflictValidator:
         Returns:
             (有效操作列表, 冲突列表)
         """
-        conflicts = self.validate(rename_json, base_path)
+        conflicts, candidates = self._validate(rename_json, base_path)
         
         # 智能去重：对于重复目标，只保留第一个，其他标记为跳过
         if smart_dedup:
@@ -381,60 +485,47 @@ class ConflictValidator:
             kept_targets: set[Path] = set()
             
             for tgt_path, dup_list in dup_by_target.items():
-                # 按源路径排序，保留第一个
-                sorted_dups = sorted(dup_list, key=lambda c: str(c.src_path))
-                # 第一个保留，其他跳过
-                for i, c in enumerate(sorted_dups):
-                    if i == 0:
-                        kept_targets.add(tgt_path)
-                    else:
+                # 保留源路径最小的一个（只需取最小值，不必整体排序），其他跳过
+                kept = min(dup_list, key=lambda c: str(c.src_path))
+                kept_targets.add(tgt_path)
+                for c in dup_list:
+                    if c is not kept:
                         skip_paths.add((c.src_path, c.tgt_path))
             
-            # 从冲突列表中移除已处理的重复目标（保留的那个）
-            conflicts = [
-                c for c in conflicts 
-                if not (c.type == ConflictType.DUPLICATE_TARGET and c.tgt_path in kept_targets and (c.src_path, c.tgt_path) not in skip_paths)
-            ]
-            # 更新跳过的冲突消息
-            for i, c in enumerate(conflicts):
-                if (c.src_path, c.tgt_path) in skip_paths:
-                    conflicts[i] = Conflict(
+            # 一次遍历：移除已处理的重复目标（保留的那个），同时更新跳过的冲突消息
+            duplicate_type = ConflictType.DUPLICATE_TARGET
+            deduped: list[Conflict] = []
+            for c in conflicts:
+                key = (c.src_path, c.tgt_path)
+                if key in skip_paths:
+                    c = Conflict(
                         type=c.type,
                         src_path=c.src_path,
                         tgt_path=c.tgt_path,
                         message=f"跳过重复: {c.src_path.name} (另一个同名源已处理)",
                     )
+                elif c.type == duplicate_type and c.tgt_path in kept_targets:
+                    continue
+                deduped.append(c)
+            conflicts = deduped
         
-        conflict_paths = {(c.src_path, c.tgt_path) for c in conflicts}
+        # 以 normcase 后的字符串作键（与 Path 的相等判断一致），
+        # 候选路径无需先构造 Path 再哈希，只为保留的操作构造 Path
+        normcase = os.path.normcase
+        conflict_keys = {
+            (normcase(str(c.src_path)), normcase(str(c.tgt_path))) for c in conflicts
+        }
 
         operations: list[tuple[Path, Path]] = []
-        seen_targets: set[Path] = set()  # 已添加的目标路径
-        base_path = Path(base_path).resolve()
-
-        def collect_operations(node: RenameNode, parent_path: Path) -> None:
-            if isinstance(node, FileNode):
-                if node.is_ready:
-                    src = parent_path / node.src
-                    tgt = parent_path / node.tgt
-                    # 跳过冲突和已处理的目标
-                    if (src, tgt) not in conflict_paths and tgt not in seen_targets:
-                        operations.append((src, tgt))
-                        seen_targets.add(tgt)
-
-            elif isinstance(node, DirNode):
-                src_path = parent_path / node.src_dir
-                # 先处理子节点
-                for child in node.children:
-                    collect_operations(child, src_path)
-                # 再处理目录本身
-                if node.is_ready:
-                    tgt = parent_path / node.tgt_dir
-                    if (src_path, tgt) not in conflict_paths and tgt not in seen_targets:
-                        operations.append((src_path, tgt))
-                        seen_targets.add(tgt)
-
-        for node in rename_json.root:
-            collect_operations(node, base_path)
+        seen_targets: set[str] = set()  # 已添加的目标路径
+
+        # 候选操作在检测时已按子项优先收集，无需再遍历一次树
+        for src, tgt in candidates:
+            tgt_key = normcase(tgt)
+            # 跳过冲突和已处理的目标
+            if (normcase(src), tgt_key) not in conflict_keys and tgt_key not in seen_targets:
+                operations.append((Path(src), Path(tgt)))
+                seen_targets.add(tgt_key)
 
         return operations, conflicts
 
@@ -451,32 +542,50 @@ def preprocess_rename_json(rename_json: RenameJSON) -> tuple[RenameJSON, list[st
         (处理后的 RenameJSON, 处理消息列表)
     """
     messages: list[str] = []
-    
-    def process_node(node: RenameNode) -> RenameNode:
-        if isinstance(node, FileNode):
+    new_root: list[RenameNode] = []
+
+    # 显式栈遍历：(节点, 输出列表, 目录的后序信息)
+    # 目录名在先序时清理（消息顺序与原来一致），子节点全部处理完后再组装目录
+    stack: list[tuple[RenameNode, list[RenameNode], tuple[str, list[RenameNode]] | None]] = [
+        (node, new_root, None) for node in reversed(rename_json.root)
+    ]
+
+    while stack:
+        node, out, post = stack.pop()
+
+        if post is not None:
+            new_tgt_dir, new_children = post
+            # 名称和子节点都未变化时复用原节点
+            if new_tgt_dir == node.tgt_dir and all(
+                new is old for new, old in zip(new_children, node.children)
+            ):
+                out.append(node)
+            else:
+                out.append(
+                    DirNode(
+                        src_dir=node.src_dir,
+                        tgt_dir=new_tgt_dir,
+                        children=new_children,
+                    )
+                )
+
+        elif isinstance(node, FileNode):
             if node.tgt:
                 sanitized, node_msgs = sanitize_filename(node.tgt, is_dir=False)
                 messages.extend(node_msgs)
                 if sanitized != node.tgt:
-                    return FileNode(src=node.src, tgt=sanitized)
-            return node
-            
-        elif isinstance(node, DirNode):
+                    node = FileNode(src=node.src, tgt=sanitized)
+            out.append(node)
+
+        else:
             new_tgt_dir = node.tgt_dir
             if node.tgt_dir:
-                sanitized, node_msgs = sanitize_filename(node.tgt_dir, is_dir=True)
+                new_tgt_dir, node_msgs = sanitize_filename(node.tgt_dir, is_dir=True)
                 messages.extend(node_msgs)
-                if sanitized != node.tgt_dir:
-                    new_tgt_dir = sanitized
-            
-            new_children = [process_node(child) for child in node.children]
-            return DirNode(
-                src_dir=node.src_dir,
-                tgt_dir=new_tgt_dir,
-                children=new_children
-            )
-        
-        return node
-    
-    new_root = [process_node(node) for node in rename_json.root]
+
+            new_children: list[RenameNode] = []
+            stack.append((node, out, (new_tgt_dir, new_children)))
+            for child in reversed(node.children):
+                stack.append((child, new_children, None))
+
     return RenameJSON(root=new_root), messages
@@ -0,0 +1,28 @@
+"""FileScanner 测试"""
+
+import os
+
+import pytest
+
+from trename.models import DirNode, FileNode
+from trename.scanner import FileScanner
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="需要符号链接支持")
+def test_self_loop_symlink_does_not_drop_siblings(tmp_path):
+    """无法判断类型的条目按文件处理，同目录的其他条目照常扫描"""
+    (tmp_path / "a.txt").write_text("")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_text("")
+    try:
+        os.symlink("loop", tmp_path / "loop")
+    except OSError:
+        pytest.skip("无法创建符号链接")
+
+    result = FileScanner().scan(tmp_path)
+
+    assert result.root == [
+        DirNode(src_dir="sub", children=[FileNode(src="b.txt")]),
+        FileNode(src="a.txt"),
+        FileNode(src="loop"),
+    ]